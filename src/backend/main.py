@@ -1,15 +1,50 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import QueryParams
 import yfinance as yf
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import numpy as np
-import ta
+import pyarrow as pa
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
-import math
-from typing import Dict, Any
+import json
+import hashlib
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from cachetools import LRUCache, TTLCache
+from typing import Dict, List, Tuple, Any
+from .indicators_numba import compute_all, compute_all_batch
 
-app = FastAPI(title="Financial Analysis API")
+try:
+    import talib
+except ImportError:
+    talib = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the indicator kernels and run the sentiment batcher for the app's lifetime"""
+    global _batcher_task, _sentiment_queue
+    warm_indicator_kernels()
+    # The queue binds to the running loop, so each startup gets a fresh one
+    _sentiment_queue = asyncio.Queue()
+    _batcher_task = asyncio.create_task(_batcher_loop(_sentiment_queue))
+    try:
+        yield
+    finally:
+        _batcher_task.cancel()
+        _batcher_task = None
+        _sentiment_queue = None
+
+app = FastAPI(title="Financial Analysis API", lifespan=lifespan)
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
 
 # CORS middleware
 app.add_middleware(
@@ -20,70 +55,257 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize FinBERT
+class ArrowAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves Arrow IPC responses (format=arrow) uncompressed"""
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and QueryParams(scope["query_string"]).get("format") == "arrow":
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress JSON responses; Arrow streams are already zstd-compressed
+app.add_middleware(ArrowAwareGZipMiddleware, minimum_size=512, compresslevel=4)
+
+# Initialize FinBERT (dynamic INT8 quantization of Linear layers for CPU inference)
+torch.set_num_threads(os.cpu_count() or 1)
 tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
+model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert", torchscript=True).eval()
+model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+# Sentiment signal is front-loaded in descriptions; 128 tokens keeps attention cheap
+SENTIMENT_MAX_LENGTH = 128
+
+# Trace against the fixed sequence length; the batch dimension stays dynamic
+_dummy = tokenizer(["x"], return_tensors="pt", padding="max_length",
+                   truncation=True, max_length=SENTIMENT_MAX_LENGTH)
+with torch.no_grad():
+    traced_model = torch.jit.freeze(
+        torch.jit.trace(model, (_dummy["input_ids"], _dummy["attention_mask"]))
+    )
+
+# Shared keep-alive session so Yahoo Finance connections are pooled across requests
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
+# Worker pool for blocking work (yfinance HTTP, pandas/numba, serialization)
+_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the worker pool so the event loop stays free"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+# Upstream yfinance caches (10 minute TTL) with one lock per key
+_hist_cache = TTLCache(maxsize=1024, ttl=600)
+_info_cache = TTLCache(maxsize=1024, ttl=600)
+_hist_locks: Dict[Any, list] = {}
+_info_locks: Dict[Any, list] = {}
+
+@asynccontextmanager
+async def _key_lock(locks: Dict[Any, list], key: Any):
+    """Hold a per-key lock, dropping it once no coroutine holds or awaits it"""
+    entry = locks.get(key)
+    if entry is None:
+        entry = locks[key] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del locks[key]
+
+async def _fetch_history(symbol: str, period: str) -> pd.DataFrame:
+    """Fetch price history, served from cache for repeat symbols"""
+    key = (symbol.upper(), period)
+    async with _key_lock(_hist_locks, key):
+        df = _hist_cache.get(key)
+        if df is None:
+            stock = yf.Ticker(symbol, session=SESSION)
+            df = await run_blocking(stock.history, period=period)
+            if not df.empty:
+                _hist_cache[key] = df
+    # Callers add indicator columns, so never hand out the cached frame
+    return df.copy(deep=True)
+
+# quoteSummary modules covering every company_info field the API returns
+INFO_MODULES = ['quoteType', 'summaryProfile', 'summaryDetail']
+
+def _fetch_info_modules(symbol: str) -> Dict[str, Any]:
+    """Fetch only the quoteSummary modules we read instead of the full `Ticker.info`"""
+    stock = yf.Ticker(symbol, session=SESSION)
+    try:
+        result = stock._quote._fetch(None, modules=INFO_MODULES)
+    except AttributeError:
+        # yfinance internals moved; fall back to the public (heavier) property
+        return stock.info
+    
+    results = (result or {}).get("quoteSummary", {}).get("result") or [{}]
+    return {
+        key: value["raw"] if isinstance(value, dict) and "raw" in value else value
+        for module in results[0].values() if isinstance(module, dict)
+        for key, value in module.items()
+    }
+
+async def _fetch_info(symbol: str) -> Dict[str, Any]:
+    """Fetch company info, served from cache for repeat symbols"""
+    key = symbol.upper()
+    async with _key_lock(_info_locks, key):
+        info = _info_cache.get(key)
+        if info is None:
+            info = await run_blocking(_fetch_info_modules, symbol)
+            # An empty dict means Yahoo rejected the call; retry next time
+            if info:
+                _info_cache[key] = info
+    return dict(info)
 
 def clean_float(value: Any) -> float:
     """Clean float values for JSON serialization"""
-    if value is None or math.isnan(value) or math.isinf(value):
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
         return 0.0
-    return float(value)
+    # f - f is NaN for both NaN and +/-inf, so this rejects all three
+    return f if f - f == 0.0 else 0.0
+
+INDICATOR_COLUMNS = ['MA20', 'MA50', 'RSI', 'MACD', 'MACD_signal', 'BB_upper', 'BB_lower']
+
+def compute_indicators(close: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Compute indicator arrays in INDICATOR_COLUMNS order
+
+    Uses TA-Lib's C implementations when installed, otherwise the fused Numba kernel.
+    The two agree on MA20/MA50 and Bollinger Bands. TA-Lib seeds RSI and the MACD EMAs
+    with an SMA, so those values differ early in the series and start later: RSI at
+    row 14 instead of 13, and MACD at row 33 instead of 25.
+    """
+    if talib is None:
+        return compute_all(close)
+    
+    c = close.astype(np.float64)
+    macd, macd_signal, _ = talib.MACD(c, fastperiod=12, slowperiod=26, signalperiod=9)
+    bb_upper, _, bb_lower = talib.BBANDS(c, timeperiod=20, nbdevup=2, nbdevdn=2)
+    indicators = (
+        talib.SMA(c, timeperiod=20), talib.SMA(c, timeperiod=50),
+        talib.RSI(c, timeperiod=14), macd, macd_signal, bb_upper, bb_lower
+    )
+    return tuple(values.astype(close.dtype) for values in indicators)
+
+def _kernel_close(df: pd.DataFrame) -> Tuple[np.ndarray, int]:
+    """Forward-filled float32 close prices with leading NaNs trimmed, plus the trim offset
+
+    The kernels carry running sums and EMAs, so a single NaN would poison every later value.
+    """
+    # Indicators are computed in float32 to halve memory traffic
+    close = df['Close'].ffill().to_numpy(dtype=np.float32)
+    valid = ~np.isnan(close)
+    start = int(valid.argmax()) if valid.any() else len(close)
+    return close[start:], start
+
+def _pad_warmup(values: np.ndarray, start: int) -> np.ndarray:
+    """Restore the rows trimmed by `_kernel_close` as NaN"""
+    if start == 0:
+        return values
+    return np.concatenate([np.full(start, np.nan, dtype=values.dtype), values])
+
+def _clean_indicator_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Fill indicator gaps and replace NaN/inf across numeric columns"""
+    # Forward-fill gaps in the indicator columns only; OHLCV data has none
+    df[INDICATOR_COLUMNS] = df[INDICATOR_COLUMNS].ffill()
+    
+    # Zero remaining NaN/inf (incl. warm-up rows) and convert numeric columns
+    # to float in one pass per dtype: indicators float32, OHLCV float64
+    base_cols = df.select_dtypes(include=[np.number]).columns.difference(INDICATOR_COLUMNS)
+    for cols, dtype in ((base_cols, np.float64), (INDICATOR_COLUMNS, np.float32)):
+        values = df[cols].to_numpy(dtype=dtype)
+        np.nan_to_num(values, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        df[cols] = values
+    
+    return df
 
 def calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """Calculate technical indicators"""
     try:
-        # Ensure data is numeric
-        price_series = pd.to_numeric(df['Close'], errors='coerce')
-        
-        # Moving Averages
-        df['MA20'] = price_series.rolling(window=20).mean()
-        df['MA50'] = price_series.rolling(window=50).mean()
-        
-        # RSI
-        df['RSI'] = ta.momentum.RSIIndicator(price_series).rsi()
-        
-        # MACD
-        macd = ta.trend.MACD(price_series)
-        df['MACD'] = macd.macd()
-        df['MACD_signal'] = macd.macd_signal()
+        close, start = _kernel_close(df)
         
-        # Bollinger Bands
-        bollinger = ta.volatility.BollingerBands(price_series)
-        df['BB_upper'] = bollinger.bollinger_hband()
-        df['BB_lower'] = bollinger.bollinger_lband()
+        # MA20/MA50, RSI, MACD, Bollinger Bands
+        df = df.assign(**{
+            col: _pad_warmup(values, start)
+            for col, values in zip(INDICATOR_COLUMNS, compute_indicators(close))
+        })
         
-        # Clean NaN values
-        df = df.fillna(method='ffill').fillna(0)
-        
-        # Convert all numeric columns to float
-        for col in df.select_dtypes(include=[np.number]).columns:
-            df[col] = df[col].apply(clean_float)
-            
-        return df
+        return _clean_indicator_frame(df)
     except Exception as e:
         print(f"Error calculating technical indicators: {str(e)}")
         return df
 
+def calculate_batch_technical_indicators(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Calculate technical indicators for several symbols with one parallel kernel call
+
+    When TA-Lib is installed each symbol goes through `calculate_technical_indicators`
+    instead, so /stocks and /stock/{symbol} always return the same values.
+    """
+    if talib is not None:
+        return {symbol: calculate_technical_indicators(df) for symbol, df in frames.items()}
+    
+    try:
+        # Concatenate the close series; symbol i spans offsets[i]:offsets[i + 1]
+        closes, starts = zip(*(_kernel_close(df) for df in frames.values()))
+        offsets = np.zeros(len(closes) + 1, dtype=np.int64)
+        np.cumsum([len(close) for close in closes], out=offsets[1:])
+        
+        indicators = compute_all_batch(np.concatenate(closes), offsets)
+        
+        results = {}
+        for i, (symbol, df) in enumerate(frames.items()):
+            lo, hi = offsets[i], offsets[i + 1]
+            df = df.assign(**{
+                col: _pad_warmup(values[lo:hi], starts[i])
+                for col, values in zip(INDICATOR_COLUMNS, indicators)
+            })
+            results[symbol] = _clean_indicator_frame(df)
+        return results
+    except Exception as e:
+        print(f"Error calculating batch technical indicators: {str(e)}")
+        return frames
+
+def warm_indicator_kernels():
+    """Trigger JIT compilation (or load from the on-disk cache) for the float32
+    signature before the first real request; `compute_all_batch` warms at import"""
+    compute_all(np.zeros(60, dtype=np.float32))
+
 def calculate_metrics(df: pd.DataFrame) -> Dict[str, float]:
     """Calculate financial metrics"""
     try:
-        returns = df['Close'].pct_change().dropna()
+        # Metrics run on the raw history, so fill gaps and drop leading NaN prices
+        close = df['Close'].ffill().dropna().to_numpy(dtype=np.float64)
+        returns = np.diff(close) / close[:-1]
         
-        metrics = {
-            'daily_returns': clean_float(returns.mean()),
-            'annual_returns': clean_float(returns.mean() * 252),
-            'volatility': clean_float(returns.std() * np.sqrt(252)),
-            'max_drawdown': clean_float(((df['Close'].cummax() - df['Close'])/df['Close'].cummax()).max()),
-        }
+        daily_returns = returns.mean()
+        annual_returns = daily_returns * 252
+        volatility = returns.std(ddof=1) * np.sqrt(252)
+        
+        running_max = np.maximum.accumulate(close)
+        max_drawdown = ((running_max - close) / running_max).max()
         
         # Sharpe Ratio (assuming risk-free rate of 0.01)
-        metrics['sharpe_ratio'] = clean_float(
-            (metrics['annual_returns'] - 0.01) / metrics['volatility'] 
-            if metrics['volatility'] != 0 else 0
+        sharpe_ratio = (
+            (annual_returns - 0.01) / volatility
+            if np.isfinite(volatility) and volatility != 0 else 0.0
+        )
+        
+        # Clean all scalars in a single vectorized call
+        values = np.nan_to_num(
+            np.array([daily_returns, annual_returns, volatility, max_drawdown, sharpe_ratio], dtype=np.float64),
+            nan=0.0, posinf=0.0, neginf=0.0
         )
         
-        return metrics
+        keys = ('daily_returns', 'annual_returns', 'volatility', 'max_drawdown', 'sharpe_ratio')
+        return dict(zip(keys, values.tolist()))
     except Exception as e:
         print(f"Error calculating metrics: {str(e)}")
         return {
@@ -94,48 +316,119 @@ def calculate_metrics(df: pd.DataFrame) -> Dict[str, float]:
             'sharpe_ratio': 0.0
         }
 
+# Dynamic batching for FinBERT: requests are coalesced for up to
+# SENTIMENT_MAX_WAIT seconds or until SENTIMENT_MAX_BATCH texts are queued
+SENTIMENT_MAX_BATCH = 16
+SENTIMENT_MAX_WAIT = 0.01
+# Upper bound on how long a request waits for its batch result
+SENTIMENT_TIMEOUT = 30.0
+_sentiment_queue = None
+_batcher_task = None
+_sentiment_cache = LRUCache(maxsize=4096)
+
+def _run_sentiment_batch(texts: List[str]) -> List[Dict[str, float]]:
+    """Run a single padded FinBERT forward pass over a batch of texts"""
+    inputs = tokenizer(
+        texts, return_tensors="pt", padding="max_length",
+        truncation=True, max_length=SENTIMENT_MAX_LENGTH
+    )
+    with torch.inference_mode():
+        logits = traced_model(inputs["input_ids"], inputs["attention_mask"])[0]
+    predictions = torch.nn.functional.softmax(logits, dim=-1).tolist()
+    
+    return [
+        {"negative": p[0], "neutral": p[1], "positive": p[2]}
+        for p in predictions
+    ]
+
+async def _batcher_loop(queue: asyncio.Queue):
+    """Drain the sentiment queue into batches and resolve waiting futures"""
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        deadline = loop.time() + SENTIMENT_MAX_WAIT
+        while len(items) < SENTIMENT_MAX_BATCH:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        try:
+            # Keep the event loop free to collect the next batch
+            results = await run_blocking(_run_sentiment_batch, [text for text, _ in items])
+            for (_, fut), result in zip(items, results):
+                if not fut.done():
+                    fut.set_result(result)
+        except Exception as e:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+
 async def analyze_sentiment(text: str) -> Dict[str, float]:
     """Analyze text sentiment using FinBERT"""
     try:
-        inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True)
-        outputs = model(**inputs)
-        predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        # Descriptions rarely change, so identical text skips inference
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        cached = _sentiment_cache.get(key)
+        if cached is not None:
+            return dict(cached)
         
-        return {
-            "negative": float(predictions[0][0]),
-            "neutral": float(predictions[0][1]),
-            "positive": float(predictions[0][2])
-        }
+        if _batcher_task is None or _batcher_task.done():
+            raise RuntimeError("sentiment batcher is not running")
+        
+        fut = asyncio.get_running_loop().create_future()
+        await _sentiment_queue.put((text, fut))
+        result = await asyncio.wait_for(fut, SENTIMENT_TIMEOUT)
+        _sentiment_cache[key] = result
+        return dict(result)
     except Exception as e:
         print(f"Error in sentiment analysis: {str(e)}")
         return {"negative": 0.0, "neutral": 0.0, "positive": 0.0}
 
+def to_arrow_stream(df: pd.DataFrame, analysis: Dict[str, Any]) -> bytes:
+    """Serialize historical data to Arrow IPC, embedding the analysis as JSON metadata"""
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"analysis": json.dumps(analysis).encode("utf-8")
+    })
+    
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
 @app.get("/stock/{symbol}")
-async def get_stock_data(symbol: str, period: str = "1y"):
-    """Get stock data and analysis"""
+async def get_stock_data(symbol: str, period: str = "1y", format: str = "json"):
+    """Get stock data and analysis
+
+    With format=arrow the historical data is returned as an Arrow IPC stream
+    and the remaining analysis is carried as JSON in the schema metadata.
+    """
     try:
-        # Fetch stock data
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period)
+        # Fetch price history and company info concurrently
+        df, info = await asyncio.gather(
+            _fetch_history(symbol, period),
+            _fetch_info(symbol)
+        )
         
         if df.empty:
             raise HTTPException(status_code=404, detail=f"No data found for {symbol}")
-            
-        # Calculate technical indicators
-        df = calculate_technical_indicators(df)
-        
-        # Calculate metrics
-        metrics = calculate_metrics(df)
         
-        # Get company info
-        info = stock.info
         description = info.get('longBusinessSummary', '')
         
-        # Get sentiment analysis
-        sentiment = await analyze_sentiment(description)
+        # Technical indicators, metrics and sentiment are independent, so overlap them
+        df, metrics, sentiment = await asyncio.gather(
+            run_blocking(calculate_technical_indicators, df),
+            run_blocking(calculate_metrics, df),
+            analyze_sentiment(description)
+        )
         
         response = {
-            "historical_data": df.reset_index().to_dict('records'),
             "metrics": metrics,
             "company_info": {
                 "name": info.get("longName", symbol),
@@ -150,12 +443,53 @@ async def get_stock_data(symbol: str, period: str = "1y"):
             "sentiment": sentiment
         }
         
+        if format == "arrow":
+            return Response(
+                content=await run_blocking(to_arrow_stream, df, response),
+                media_type=ARROW_STREAM_MEDIA_TYPE
+            )
+        
+        response["historical_data"] = await run_blocking(df.reset_index().to_dict, 'records')
         return response
         
     except Exception as e:
         print(f"Error processing request: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_stocks_payload(frames: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """Calculate indicators and metrics for every symbol and serialize the results"""
+    # One parallel kernel call covers every symbol
+    frames = calculate_batch_technical_indicators(frames)
+    
+    return {
+        symbol: {
+            "historical_data": df.reset_index().to_dict('records'),
+            "metrics": calculate_metrics(df)
+        }
+        for symbol, df in frames.items()
+    }
+
+@app.get("/stocks")
+async def get_stocks_data(symbols: str, period: str = "1y"):
+    """Get stock data, technical indicators and metrics for comma-separated symbols"""
+    try:
+        tickers = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+        if not tickers:
+            raise HTTPException(status_code=400, detail="No symbols provided")
+        
+        histories = await asyncio.gather(*(_fetch_history(t, period) for t in tickers))
+        frames = {t: df for t, df in zip(tickers, histories) if not df.empty}
+        if not frames:
+            raise HTTPException(status_code=404, detail=f"No data found for {symbols}")
+        
+        return await run_blocking(build_stocks_payload, frames)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error processing request: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/")
 async def root():
     return {
@@ -163,6 +497,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": [
             "/stock/{symbol}",
+            "/stocks",
             "/"
         ]
     }
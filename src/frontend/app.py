@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import requests
+import orjson
+import pyarrow as pa
 from datetime import datetime
 import numpy as np
 
@@ -156,11 +158,16 @@ def display_sentiment(sentiment, description):
 # Main app logic
 if symbol:
     try:
-        response = requests.get(f"http://localhost:8000/stock/{symbol}")
+        response = requests.get(
+            f"http://localhost:8000/stock/{symbol}",
+            params={"format": "arrow"}
+        )
         
         if response.status_code == 200:
-            data = response.json()
-            df = pd.DataFrame(data['historical_data'])
+            # Historical data arrives as an Arrow stream, analysis as schema metadata
+            reader = pa.ipc.open_stream(response.content)
+            data = orjson.loads(reader.schema.metadata[b'analysis'])
+            df = reader.read_pandas()
             df['Date'] = pd.to_datetime(df['Date'], utc=True)
             metrics = data['metrics']
             company_info = data['company_info']